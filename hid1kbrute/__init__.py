@@ -6,7 +6,13 @@ RFID Card Analyzer Package
 from .analyzer import RFIDAnalyzer
 from .display import ResultDisplay
 from .models import CardData, Match, FCCandidate
-from .utils import hex_to_binary, load_cards_from_file, load_hid_patterns
+from .utils import (
+    hex_to_binary,
+    hex_to_bit_streams,
+    hex_to_int,
+    load_cards_from_file,
+    load_hid_patterns,
+)
 
 __version__ = "2.0.0"
 __all__ = [
@@ -16,6 +22,8 @@ __all__ = [
     "Match",
     "FCCandidate",
     "hex_to_binary",
+    "hex_to_bit_streams",
+    "hex_to_int",
     "load_cards_from_file",
     "load_hid_patterns",
 ]
@@ -1,18 +1,34 @@
 #!/usr/bin/env python3
 """
-Multithreaded RFID card analysis logic with reduced code complexity
+RFID card analysis logic with reduced code complexity
 """
 
+import bisect
+import heapq
 import itertools
 import sys
 import threading
 import time
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Optional, Set, Tuple
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from .models import CardData, FCCandidate, Match
-from .utils import hex_to_binary, load_hid_patterns
+from .utils import hex_to_bit_streams, load_hid_patterns
+
+# Raw scan rows start with the Match signature fields, followed by the
+# FC and CN values
+_SIGNATURE_LEN = 7
+
+# Range of facility codes considered reasonable
+_MIN_FC = 1
+_MAX_FC = 65535
+
+# _MASKS[n] == (1 << n) - 1; extended by _ensure_masks for wider windows
+_MASKS = tuple((1 << i) - 1 for i in range(65))
+
+# _BIT_SPECS[n] formats a value as n binary digits
+_BIT_SPECS = tuple(f"0{i}b" for i in range(65))
 
 
 class ProgressBar:
@@ -50,8 +66,399 @@ class ProgressBar:
             self._display()
 
 
+def _ensure_masks(max_len: int):
+    """Make sure _MASKS covers fields and windows up to max_len bits"""
+    global _MASKS
+    if max_len >= len(_MASKS):
+        _MASKS = tuple((1 << i) - 1 for i in range(max_len + 1))
+
+
+def _find_fields(bits: str, value: int, max_len: int) -> List[Tuple]:
+    """Find the (start, length) fields of a bit string holding value"""
+    # No field may use the last bit, as in the window enumeration
+    end = len(bits) - 1
+    fields = []
+    needle = format(value, "b")
+    for length in range(len(needle), max_len + 1):
+        # Each needle is the previous one with a leading zero, so once one
+        # is missing no longer one can be present
+        pos = bits.find(needle, 0, end)
+        if pos == -1:
+            break
+        while pos != -1:
+            fields.append((pos, length))
+            pos = bits.find(needle, pos + 1, end)
+        needle = "0" + needle
+
+    # By start, then length, as _enumerate_fc_cn orders its rows
+    fields.sort()
+    return fields
+
+
+def _window_fields(
+    fields: List[Tuple], offset: int, window_len: int
+) -> List[Tuple]:
+    """Select the fields lying inside a window, relative to its offset"""
+    lo = bisect.bisect_left(fields, (offset,))
+    hi = bisect.bisect_left(fields, (offset + window_len,), lo)
+    window_end = offset + window_len - 1
+    return [
+        (start - offset, length)
+        for start, length in fields[lo:hi]
+        if start + length <= window_end
+    ]
+
+
+def _fc_fields(
+    window: int, window_len: int, min_cn_len: int, fc_range: Tuple[int, int]
+) -> List[Tuple]:
+    """List the (fc_start, fc_len, fc_val) FC placements of a window"""
+    masks = _MASKS
+    min_fc, max_fc = fc_range
+    fields = []
+    append = fields.append
+    for fc_start in range(window_len):
+        rest = window_len - fc_start
+        tail = window & masks[rest]
+
+        # Leave the last bit unused, and room after the field for a CN of
+        # min_cn_len bits when none fits before it
+        max_len = rest - 1
+        if fc_start < min_cn_len:
+            max_len -= min_cn_len
+
+        for fc_len in range(1, max_len + 1):
+            fc_val = tail >> (rest - fc_len)
+
+            # Growing the field only appends bits, so once the value is
+            # too large every longer FC from this start is too
+            if fc_val > max_fc:
+                break
+            if fc_val >= min_fc:
+                append((fc_start, fc_len, fc_val))
+    return fields
+
+
+def _enumerate_fc_cn(
+    groups: Dict[int, List[Tuple]],
+    window: int,
+    window_len: int,
+    reverse: bool,
+    offset: int,
+    fc_fields: List[Tuple],
+):
+    """Enumerate every CN placement not overlapping the given FC fields"""
+    masks = _MASKS
+    for fc_start, fc_len, fc_val in fc_fields:
+        append = groups[fc_val].append
+
+        # CN placements before the FC field, then after it
+        for cn_start in range(fc_start):
+            rest = window_len - cn_start
+            tail = window & masks[rest]
+            for cn_len in range(1, fc_start - cn_start + 1):
+                append(
+                    (
+                        reverse,
+                        offset,
+                        window_len,
+                        fc_start,
+                        fc_len,
+                        cn_start,
+                        cn_len,
+                        fc_val,
+                        tail >> (rest - cn_len),
+                    )
+                )
+
+        for cn_start in range(fc_start + fc_len, window_len):
+            rest = window_len - cn_start
+            tail = window & masks[rest]
+            for cn_len in range(1, rest):
+                append(
+                    (
+                        reverse,
+                        offset,
+                        window_len,
+                        fc_start,
+                        fc_len,
+                        cn_start,
+                        cn_len,
+                        fc_val,
+                        tail >> (rest - cn_len),
+                    )
+                )
+
+
+def _enumerate_layouts(
+    groups: Dict[int, List[Tuple]],
+    window: int,
+    window_len: int,
+    reverse: bool,
+    offset: int,
+    layouts: List[Tuple[int, int, int, int]],
+    known_fc: Optional[int],
+    known_cn: int,
+    fc_range: Tuple[int, int],
+):
+    """Evaluate a fixed list of (fc_start, fc_len, cn_start, cn_len)
+    layouts in a window, appending rows like _enumerate_fc_cn"""
+    masks = _MASKS
+    min_fc, max_fc = fc_range
+    any_cn = known_cn == -1
+
+    for fc_start, fc_len, cn_start, cn_len in layouts:
+        fc_val = masks[fc_len] & (window >> (window_len - fc_start - fc_len))
+        if not min_fc <= fc_val <= max_fc:
+            continue
+        if known_fc is not None and fc_val != known_fc:
+            continue
+
+        cn_val = masks[cn_len] & (window >> (window_len - cn_start - cn_len))
+        if any_cn or cn_val == known_cn:
+            groups[fc_val].append(
+                (
+                    reverse,
+                    offset,
+                    window_len,
+                    fc_start,
+                    fc_len,
+                    cn_start,
+                    cn_len,
+                    fc_val,
+                    cn_val,
+                )
+            )
+
+
+def _pair_fields(
+    groups: Dict[int, List[Tuple]],
+    window_len: int,
+    reverse: bool,
+    offset: int,
+    fc_fields: List[Tuple],
+    cn_fields: List[Tuple],
+    known_cn: int,
+):
+    """Pair FC fields with the non-overlapping fields holding known_cn"""
+    for fc_start, fc_len, fc_val in fc_fields:
+        fc_end = fc_start + fc_len
+        for cn_start, cn_len in cn_fields:
+            if cn_start + cn_len <= fc_start or cn_start >= fc_end:
+                groups[fc_val].append(
+                    (
+                        reverse,
+                        offset,
+                        window_len,
+                        fc_start,
+                        fc_len,
+                        cn_start,
+                        cn_len,
+                        fc_val,
+                        known_cn,
+                    )
+                )
+
+
+def _scan_stream(
+    groups: Dict[int, List[Tuple]],
+    stream: int,
+    bits: str,
+    reverse: bool,
+    min_bits: int,
+    max_bits: int,
+    known_fc: Optional[int],
+    known_cn: int,
+    fc_range: Tuple[int, int],
+):
+    """Enumerate every window of one stream direction"""
+    stream_len = len(bits)
+
+    # A window must fit both fields plus its last bit, which no field uses
+    min_fc_len = 1 if known_fc is None else max(1, known_fc.bit_length())
+    min_cn_len = 1 if known_cn == -1 else max(1, known_cn.bit_length())
+    min_bits = max(min_bits, min_fc_len + min_cn_len + 1)
+    max_bits = min(max_bits, stream_len)
+    if min_bits > max_bits:
+        return
+
+    # Known values are located once per stream
+    fc_hits = cn_hits = None
+    if known_fc is not None:
+        fc_hits = _find_fields(bits, known_fc, max_bits - 1)
+        if not fc_hits:
+            return
+    if known_cn != -1:
+        cn_hits = _find_fields(bits, known_cn, max_bits - 1)
+        if not cn_hits:
+            return
+
+    # Only windows that can hold a field of every known value are visited
+    first_end, last_start = 0, stream_len
+    for hits in (fc_hits, cn_hits):
+        if hits is not None:
+            first_end = max(
+                first_end, min(start + length for start, length in hits)
+            )
+            last_start = min(last_start, hits[-1][0])
+
+    for window_len in range(min_bits, max_bits + 1):
+        window_mask = _MASKS[window_len]
+        shift = stream_len - window_len
+        first_offset = max(0, first_end - window_len + 1)
+        last_offset = min(stream_len - window_len, last_start)
+        for offset in range(first_offset, last_offset + 1):
+            if cn_hits is not None:
+                cn_fields = _window_fields(cn_hits, offset, window_len)
+                if not cn_fields:
+                    continue
+
+            if fc_hits is None or cn_hits is None:
+                window = (stream >> (shift - offset)) & window_mask
+
+            if fc_hits is None:
+                fc_fields = _fc_fields(window, window_len, min_cn_len, fc_range)
+            else:
+                fc_fields = [
+                    (fc_start, fc_len, known_fc)
+                    for fc_start, fc_len in _window_fields(
+                        fc_hits, offset, window_len
+                    )
+                ]
+
+            if cn_hits is None:
+                _enumerate_fc_cn(
+                    groups, window, window_len, reverse, offset, fc_fields
+                )
+            else:
+                _pair_fields(
+                    groups,
+                    window_len,
+                    reverse,
+                    offset,
+                    fc_fields,
+                    cn_fields,
+                    known_cn,
+                )
+
+
+def _scan_layouts(
+    groups: Dict[int, List[Tuple]],
+    stream: int,
+    stream_len: int,
+    reverse: bool,
+    min_bits: int,
+    max_bits: int,
+    layouts: Dict[int, List[Tuple[int, int, int, int]]],
+    known_fc: Optional[int],
+    known_cn: int,
+    fc_range: Tuple[int, int],
+):
+    """Evaluate the given layouts, keyed by window length, in every window
+    of one stream direction"""
+    # Only the layout window lengths that fit the stream are visited
+    max_bits = min(max_bits, stream_len)
+    window_lens = sorted(w for w in layouts if min_bits <= w <= max_bits)
+
+    for window_len in window_lens:
+        window_mask = _MASKS[window_len]
+        shift = stream_len - window_len
+        for offset in range(stream_len - window_len + 1):
+            _enumerate_layouts(
+                groups,
+                (stream >> (shift - offset)) & window_mask,
+                window_len,
+                reverse,
+                offset,
+                layouts[window_len],
+                known_fc,
+                known_cn,
+                fc_range,
+            )
+
+
+def _scan_card(
+    bit_streams: Tuple[Tuple[int, str], ...],
+    known_cn: int,
+    min_bits: int,
+    max_bits: int,
+    known_fc: Optional[int],
+    shapes: Optional[Tuple[Tuple[int, int, int, int, int], ...]] = None,
+    reasonable_fc: bool = True,
+) -> Dict[int, List[Tuple]]:
+    """Scan one card's bitstream in both directions
+
+    bit_streams is hex_to_bit_streams() of the card's data. Returns raw rows
+    grouped by FC value. Rows are (reverse, window_offset, window_length,
+    fc_start, fc_len, cn_start, cn_len, fc_val, cn_val); the first
+    _SIGNATURE_LEN fields equal Match.get_signature(). Kept at module level
+    and free of Match objects so it can run in a worker process.
+
+    With shapes=None every FC/CN placement is tried; otherwise only the
+    given (window_len, fc_start, fc_len, cn_start, cn_len) shapes are.
+    With reasonable_fc, only FC values within _MIN_FC.._MAX_FC are kept.
+    """
+    _ensure_masks(max_bits)
+
+    # Without reasonable_fc, every value a field can hold is kept
+    fc_range = (_MIN_FC, _MAX_FC) if reasonable_fc else (0, _MASKS[max_bits])
+    if known_fc is not None and not fc_range[0] <= known_fc <= fc_range[1]:
+        return {}
+
+    layouts = None
+    if shapes is not None:
+        # Fields narrower than a known value's bit length can never hold
+        # it, so those layouts are dropped up front
+        min_fc_len = 1 if known_fc is None else known_fc.bit_length()
+        min_cn_len = 1 if known_cn == -1 else known_cn.bit_length()
+
+        layouts = defaultdict(list)
+        for window_len, fc_start, fc_len, cn_start, cn_len in shapes:
+            if fc_len >= min_fc_len and cn_len >= min_cn_len:
+                layouts[window_len].append((fc_start, fc_len, cn_start, cn_len))
+        if not layouts:
+            return {}
+
+    groups = defaultdict(list)
+    for reverse, (stream, bits) in zip((False, True), bit_streams):
+        if layouts is None:
+            _scan_stream(
+                groups,
+                stream,
+                bits,
+                reverse,
+                min_bits,
+                max_bits,
+                known_fc,
+                known_cn,
+                fc_range,
+            )
+        else:
+            _scan_layouts(
+                groups,
+                stream,
+                len(bits),
+                reverse,
+                min_bits,
+                max_bits,
+                layouts,
+                known_fc,
+                known_cn,
+                fc_range,
+            )
+
+    return dict(groups)
+
+
+def _is_narrow_scan(key: Tuple) -> bool:
+    """Whether a _scan_card key is restricted by a known CN, a known FC or
+    format shapes, keeping its result small"""
+    _, known_cn, _, _, known_fc, shapes, _ = key
+    return known_cn != -1 or known_fc is not None or shapes is not None
+
+
 class RFIDAnalyzer:
-    """Multithreaded RFID card analyzer"""
+    """RFID card analyzer"""
 
     def __init__(
         self,
@@ -61,16 +468,34 @@ class RFIDAnalyzer:
         unknown_cn_mode: bool = False,
         max_threads: int = 4,
         show_progress: bool = True,
+        exhaustive: bool = True,
+        use_processes: bool = False,
     ):
         self.min_bits = min_bits
         self.max_bits = max_bits
         self.known_fc = known_fc
         self.unknown_cn_mode = unknown_cn_mode
+        # Number of worker processes; only used with use_processes
         self.max_threads = max_threads
         self.show_progress = show_progress
+        self.exhaustive = exhaustive
+        # Opt-in worker processes for the scans. Under the spawn and
+        # forkserver start methods the calling script must guard its entry
+        # point with `if __name__ == "__main__":`
+        self.use_processes = use_processes
         self.cards: List[CardData] = []
         self._card_counter = 0
         self.hid_patterns = load_hid_patterns()
+        # Layouts that match a known HID format; the only ones scanned
+        # when exhaustive is off
+        self._candidate_shapes = self._build_candidate_shapes()
+        self._format_bounds = self._build_format_bounds()
+        # Format matched by each (window_len, fc_start, fc_len, cn_start,
+        # cn_len) layout seen so far; candidates share most layouts
+        self._shape_formats: Dict[Tuple, Optional[str]] = {}
+        # Scan rows keyed by _scan_args(); reused across API calls and by
+        # cards that share the same data
+        self._scan_cache: Dict[Tuple, Dict[int, List[Tuple]]] = {}
 
     def add_card(
         self,
@@ -95,176 +520,316 @@ class RFIDAnalyzer:
             )
         return self
 
-    def _analyze_card_worker(self, card: CardData) -> List[Match]:
-        """Worker function for analyzing a single card"""
-        raw_bits = hex_to_binary(card.hex_data)
-        matches = []
+    def clear_scan_cache(self):
+        """Release the raw scan rows kept between analysis calls"""
+        self._scan_cache.clear()
+        return self
 
-        for reverse in [False, True]:
-            bitstream = raw_bits[::-1] if reverse else raw_bits
+    def _build_candidate_shapes(
+        self,
+    ) -> Tuple[Tuple[int, int, int, int, int], ...]:
+        """Build every (window_len, fc_start, fc_len, cn_start, cn_len)
+        layout that _apply_format_matching accepts for a loaded format"""
+        if not self.hid_patterns.get("formats"):
+            return ()
 
-            for window_len in range(
-                self.min_bits, min(self.max_bits + 1, len(bitstream) + 1)
+        tolerance = self.hid_patterns["tolerance"]
+        bit_tol = range(-tolerance["bit_length"], tolerance["bit_length"] + 1)
+        pos_tol = range(-tolerance["position"], tolerance["position"] + 1)
+
+        shapes = set()
+        for fmt in self.hid_patterns["formats"]:
+            for (
+                window_len,
+                fc_start,
+                fc_len,
+                cn_start,
+                cn_len,
+            ) in itertools.product(
+                [fmt["total_bits"] + d for d in bit_tol],
+                [fmt["fc_position"] + d for d in pos_tol],
+                [fmt["fc_bits"] + d for d in bit_tol],
+                [fmt["cn_position"] + d for d in pos_tol],
+                [fmt["cn_bits"] + d for d in bit_tol],
             ):
-                for offset in range(len(bitstream) - window_len + 1):
-                    window = bitstream[offset : offset + window_len]
-                    matches.extend(
-                        self._find_fc_cn_in_window(
-                            window, card, reverse, offset, window_len
-                        )
+                # Same placement rules as the exhaustive enumeration
+                if (
+                    min(fc_start, cn_start) >= 0
+                    and min(fc_len, cn_len) >= 1
+                    and fc_start + fc_len < window_len
+                    and cn_start + cn_len < window_len
+                    and (
+                        fc_start + fc_len <= cn_start
+                        or cn_start + cn_len <= fc_start
                     )
+                ):
+                    shapes.add((window_len, fc_start, fc_len, cn_start, cn_len))
+
+        return tuple(sorted(shapes))
+
+    def _scan_args(self, card: CardData, reasonable_fc: bool = True) -> Tuple:
+        """Arguments for _scan_card describing one card"""
+        return (
+            hex_to_bit_streams(card.hex_data),
+            card.known_cn,
+            self.min_bits,
+            self.max_bits,
+            self.known_fc,
+            None if self.exhaustive else self._candidate_shapes,
+            reasonable_fc,
+        )
+
+    def _build_matches(
+        self, named_rows: Iterable[Tuple[str, Tuple]]
+    ) -> List[Match]:
+        """Wrap (card_name, raw scan row) pairs into Match objects"""
+        # Fields are shorter than max_bits
+        specs = _BIT_SPECS
+        if self.max_bits > len(specs):
+            specs = [f"0{i}b" for i in range(self.max_bits)]
+
+        return [
+            Match(
+                reverse,
+                offset,
+                window_len,
+                fc_val,
+                format(fc_val, specs[fc_len]),
+                fc_start,
+                fc_len,
+                cn_val,
+                format(cn_val, specs[cn_len]),
+                cn_start,
+                cn_len,
+                card_name,
+            )
+            for card_name, (
+                reverse,
+                offset,
+                window_len,
+                fc_start,
+                fc_len,
+                cn_start,
+                cn_len,
+                fc_val,
+                cn_val,
+            ) in named_rows
+        ]
+
+    def _derive_scan(self, key: Tuple) -> Optional[Dict[int, List[Tuple]]]:
+        """Build a scan from a cached, less restricted one, if any"""
+        # A scan for one known FC holds exactly that FC's group of the same
+        # scan without a known FC, and a scan of reasonable FC values the
+        # in-range groups of the same scan keeping every value
+        known_fc, reasonable_fc = key[4], key[-1]
+        sources = []
+        if reasonable_fc:
+            sources.append(key[:-1] + (False,))
+        if known_fc is not None:
+            general = key[:4] + (None,) + key[5:]
+            sources.append(general)
+            if reasonable_fc:
+                sources.append(general[:-1] + (False,))
+
+        for source in sources:
+            groups = self._scan_cache.get(source)
+            if groups is None:
+                continue
 
-        return matches
+            if known_fc is not None and source[4] is None:
+                rows = groups.get(known_fc)
+                groups = {known_fc: rows} if rows else {}
+            if reasonable_fc and not source[-1]:
+                groups = {
+                    fc_val: rows
+                    for fc_val, rows in groups.items()
+                    if _MIN_FC <= fc_val <= _MAX_FC
+                }
+            return groups
 
-    def _find_fc_cn_in_window(
-        self,
-        window: str,
-        card: CardData,
-        reverse: bool,
-        offset: int,
-        window_len: int,
-    ) -> List[Match]:
-        """Find FC/CN combinations in a window"""
-        matches = []
+        return None
 
-        for fc_start in range(window_len):
-            for fc_len in range(1, window_len - fc_start):
-                fc_bits = window[fc_start : fc_start + fc_len]
-                fc_val = int(fc_bits, 2)
+    def _scan_cards(
+        self,
+        cards: List[CardData],
+        desc: str = "Analyzing cards",
+        reasonable_fc: bool = True,
+    ) -> List[Dict[int, List[Tuple]]]:
+        """Scan cards in this process, handing narrow scans to worker
+        processes when use_processes is set
+
+        Only cards without a cached scan, or one it can be derived from,
+        are scanned. Returns each card's raw rows grouped by FC value, in
+        card order.
+        """
+        scan_cache = self._scan_cache
+        keys = [self._scan_args(card, reasonable_fc) for card in cards]
+        pending = []
+        for key in dict.fromkeys(keys):
+            if key in scan_cache:
+                continue
 
-                if self.known_fc is not None and fc_val != self.known_fc:
-                    continue
+            groups = self._derive_scan(key)
+            if groups is None:
+                pending.append(key)
+            else:
+                scan_cache[key] = groups
+
+        if self.show_progress and pending:
+            progress = ProgressBar(len(pending), desc)
+
+        # Worker rows come back pickled, which costs more than the scan
+        # itself unless it is narrowed by a known value or format shapes,
+        # so only several such scans are dispatched
+        local, remote = pending, []
+        if self.use_processes and self.max_threads > 1:
+            narrow = [key for key in pending if _is_narrow_scan(key)]
+            if len(narrow) > 1:
+                local = [key for key in pending if not _is_narrow_scan(key)]
+                remote = narrow
+
+        for key in local:
+            scan_cache[key] = _scan_card(*key)
+            if self.show_progress:
+                progress.update()
 
-                for cn_start in range(window_len):
-                    for cn_len in range(1, window_len - cn_start):
-                        # Skip overlapping regions
-                        if not (
-                            fc_start + fc_len <= cn_start
-                            or cn_start + cn_len <= fc_start
-                        ):
-                            continue
-
-                        cn_bits = window[cn_start : cn_start + cn_len]
-                        cn_val = int(cn_bits, 2)
-
-                        # Check CN matching
-                        if card.known_cn == -1 or cn_val == card.known_cn:
-                            matches.append(
-                                Match(
-                                    reverse=reverse,
-                                    window_offset=offset,
-                                    window_length=window_len,
-                                    fc_value=fc_val,
-                                    fc_bits=fc_bits,
-                                    fc_start=fc_start,
-                                    fc_length=fc_len,
-                                    cn_value=cn_val,
-                                    cn_bits=cn_bits,
-                                    cn_start=cn_start,
-                                    cn_length=cn_len,
-                                    card_name=card.name,
-                                )
-                            )
-
-        return matches
-
-    def _analyze_cards_threaded(self) -> List[Match]:
-        """Analyze all cards using multiple threads"""
-        all_matches = []
-
-        if self.show_progress:
-            progress = ProgressBar(len(self.cards), "Analyzing cards")
-
-        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-            # Submit all card analysis tasks
-            future_to_card = {
-                executor.submit(self._analyze_card_worker, card): card
-                for card in self.cards
-            }
+        if remote:
+            # Longest streams first, so a big card is not left running
+            # alone at the end
+            remote.sort(key=lambda key: len(key[0][0][1]), reverse=True)
 
-            # Collect results as they complete
-            for future in as_completed(future_to_card):
-                matches = future.result()
-                all_matches.extend(matches)
+            workers = min(self.max_threads, len(remote))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                future_to_key = {
+                    executor.submit(_scan_card, *key): key for key in remote
+                }
 
-                if self.show_progress:
-                    progress.update()
+                for future in as_completed(future_to_key):
+                    scan_cache[future_to_key[future]] = future.result()
+                    if self.show_progress:
+                        progress.update()
 
-        if self.show_progress:
+        if self.show_progress and pending:
             progress.close()
 
-        return all_matches
+        return [scan_cache[key] for key in keys]
 
     def find_fc_candidates(self) -> List[FCCandidate]:
-        """Find FC candidates with multithreading"""
+        """Find FC candidates from the card scans"""
         if not self.cards:
             return []
 
-        # Get all matches using threading
-        all_matches = self._analyze_cards_threaded()
-
-        # Group matches by FC value
-        fc_groups = defaultdict(list)
-        for match in all_matches:
-            fc_groups[match.fc_value].append(match)
+        # Get raw rows for every card; each scan already groups its rows
+        # by FC value
+        card_groups = self._scan_cards(self.cards)
 
-        candidates = []
         has_unknown_cn = any(card.known_cn == -1 for card in self.cards)
 
-        if self.show_progress and len(fc_groups) > 1:
-            progress = ProgressBar(len(fc_groups), "Processing FC candidates")
+        # Rows are unique within a scan, so duplicates only come from a
+        # card listed twice under the same name; such repeats count once
+        unique_groups = []
+        seen_cards = set()
+        for card_idx, (card, groups) in enumerate(zip(self.cards, card_groups)):
+            card_key = (card.name, card.hex_data, card.known_cn)
+            if card_key not in seen_cards:
+                seen_cards.add(card_key)
+                unique_groups.append((card_idx, groups))
+
+        # FC values in first-seen order. With every CN known a candidate
+        # needs its FC on every card, so only the values shared by all
+        # scans are visited
+        if not has_unknown_cn and len(card_groups) > 1:
+            common_fcs = set(card_groups[0]).intersection(*card_groups[1:])
+            fc_values = [fc for fc in card_groups[0] if fc in common_fcs]
+        else:
+            fc_values = list(
+                dict.fromkeys(
+                    fc for _, groups in unique_groups for fc in groups
+                )
+            )
 
-        for i, (fc_value, matches) in enumerate(fc_groups.items()):
-            if not self._is_reasonable_fc_value(fc_value):
-                if self.show_progress and len(fc_groups) > 1:
-                    progress.update()
-                continue
+        candidates = []
+
+        if self.show_progress and len(fc_values) > 1:
+            progress = ProgressBar(len(fc_values), "Processing FC candidates")
+
+        # Each FC's rows are gathered from the card scans as it is
+        # processed, rather than merged into one nested dict up front.
+        # Match objects are only built for the rows that end up in a
+        # candidate
+        for fc_value in fc_values:
+            rows_by_card = {
+                card_idx: groups[fc_value]
+                for card_idx, groups in unique_groups
+                if fc_value in groups
+            }
 
             if has_unknown_cn:
                 candidate = self._process_unknown_cn_candidate(
-                    fc_value, matches
+                    fc_value, rows_by_card
                 )
             else:
-                candidate = self._process_known_cn_candidate(fc_value, matches)
+                candidate = self._process_known_cn_candidate(
+                    fc_value, rows_by_card
+                )
 
             if candidate:
                 self._apply_format_matching(candidate)
                 candidates.append(candidate)
 
-            if self.show_progress and len(fc_groups) > 1:
+            if self.show_progress and len(fc_values) > 1:
                 progress.update()
 
-        if self.show_progress and len(fc_groups) > 1:
+        if self.show_progress and len(fc_values) > 1:
             progress.close()
 
+        # Full scans that keep every FC value hold millions of rows and are
+        # only needed by the pattern analysis, so they are not kept once
+        # candidates are built
+        for key in list(self._scan_cache):
+            if not key[-1] and not _is_narrow_scan(key):
+                del self._scan_cache[key]
+
         return candidates
 
     def _process_known_cn_candidate(
-        self, fc_value: int, matches: List[Match]
+        self, fc_value: int, rows_by_card: Dict[int, List[Tuple]]
     ) -> Optional[FCCandidate]:
         """Process candidate when CNs are known"""
         if len(self.cards) == 1:
+            card_name = self.cards[0].name
+            matches = self._build_matches(
+                (card_name, row) for row in rows_by_card[0]
+            )
             return FCCandidate(fc_value, matches, 1.0)
 
-        valid_matches = self._filter_consistent_matches(matches)
-        if valid_matches:
-            card_count = len(set(match.card_name for match in valid_matches))
+        # Full consistency needs the FC on every card, so an FC missing
+        # from any card is dropped before its rows are compared
+        if len(rows_by_card) < len(self.cards):
+            return None
+
+        # Matches are only built once the candidate is known to be kept
+        valid_rows = self._filter_consistent_rows(rows_by_card)
+        if valid_rows:
+            card_count = len(set(card_name for card_name, _ in valid_rows))
             consistency = card_count / len(self.cards)
             if consistency == 1.0:
-                return FCCandidate(fc_value, valid_matches, consistency)
+                return FCCandidate(
+                    fc_value, self._build_matches(valid_rows), consistency
+                )
 
         return None
 
     def _process_unknown_cn_candidate(
-        self, fc_value: int, matches: List[Match]
+        self, fc_value: int, rows_by_card: Dict[int, List[Tuple]]
     ) -> Optional[FCCandidate]:
         """Process candidate when CNs are unknown"""
-        card_names_with_fc = set(match.card_name for match in matches)
+        card_names_with_fc = set(self.cards[i].name for i in rows_by_card)
         min_threshold = max(2, len(self.cards) * 0.5)
 
         if len(card_names_with_fc) >= min_threshold:
             best_matches = self._find_best_pattern_for_fc(
-                matches, card_names_with_fc
+                rows_by_card, card_names_with_fc
             )
             if best_matches:
                 consistency = len(card_names_with_fc) / len(self.cards)
@@ -273,118 +838,186 @@ class RFIDAnalyzer:
         return None
 
     def _find_best_pattern_for_fc(
-        self, matches: List[Match], card_names: Set[str]
+        self, rows_by_card: Dict[int, List[Tuple]], card_names: Set[str]
     ) -> List[Match]:
         """Find the best pattern for an FC value"""
-        # Group by pattern signature
-        pattern_groups = defaultdict(list)
-        for match in matches:
-            sig = (
-                match.reverse,
-                match.window_offset,
-                match.window_length,
-                match.fc_start,
-                match.fc_length,
-                match.cn_start,
-                match.cn_length,
-            )
-            pattern_groups[sig].append(match)
-
-        # Find pattern with best coverage
-        best_matches = []
-        best_coverage = 0
-
-        for pattern_matches in pattern_groups.values():
-            pattern_cards = set(match.card_name for match in pattern_matches)
-            coverage = len(pattern_cards)
-
+        # Count the cards covering each pattern signature. Signatures are
+        # unique within a scan, so each card's signatures are counted
+        # directly; only cards sharing a name need their repeats dropped
+        names = [self.cards[card_idx].name for card_idx in rows_by_card]
+        shared_names = len(set(names)) < len(names)
+        seen_by_name: Dict[str, Set[Tuple]] = defaultdict(set)
+
+        coverage_by_sig = Counter()
+        for card_name, rows in zip(names, rows_by_card.values()):
+            sigs = [row[:_SIGNATURE_LEN] for row in rows]
+            if shared_names:
+                seen = seen_by_name[card_name]
+                sigs = [sig for sig in sigs if sig not in seen]
+                seen.update(sigs)
+            coverage_by_sig.update(sigs)
+
+        # First signature with the best coverage, in scan order
+        best_sig, best_coverage = None, 0
+        for sig, coverage in coverage_by_sig.items():
             if coverage > best_coverage:
-                best_coverage = coverage
-                best_matches = pattern_matches
+                best_sig, best_coverage = sig, coverage
 
         # Return if good coverage, otherwise return representative matches
         if best_coverage >= max(2, len(card_names) * 0.8):
-            return best_matches
-
-        # One match per card
-        representative = []
-        for card_name in card_names:
-            card_matches = [m for m in matches if m.card_name == card_name]
-            if card_matches:
-                # Pick best match based on standard characteristics
-                best = max(
-                    card_matches,
-                    key=lambda m: (
-                        1 if 8 <= m.fc_length <= 16 else 0,
-                        1 if 8 <= m.cn_length <= 24 else 0,
-                        0 if m.reverse else 1,
-                        1 if 26 <= m.window_length <= 37 else 0,
-                    ),
+            best_rows = [
+                (card_name, row)
+                for card_name, rows in zip(names, rows_by_card.values())
+                for row in rows
+                if row[:_SIGNATURE_LEN] == best_sig
+            ]
+            return self._build_matches(best_rows)
+
+        # One match per card, picked in a single pass over the rows. The
+        # score weighs standard characteristics in priority order
+        # (row fields: 0=reverse, 2=window, 4=FC length, 6=CN length)
+        best_by_card: Dict[str, Tuple[int, Tuple]] = {}
+        for card_idx, rows in rows_by_card.items():
+            card_name = self.cards[card_idx].name
+            best_score, best_row = best_by_card.get(card_name, (-1, None))
+
+            for row in rows:
+                score = (
+                    (8 <= row[4] <= 16) * 8
+                    + (8 <= row[6] <= 24) * 4
+                    + (not row[0]) * 2
+                    + (26 <= row[2] <= 37)
                 )
-                representative.append(best)
-
-        return representative
-
-    def _filter_consistent_matches(self, matches: List[Match]) -> List[Match]:
-        """Filter matches for consistent patterns across cards"""
-        card_matches = defaultdict(list)
-        for match in matches:
-            card_matches[match.card_name].append(match)
-
-        valid_matches = []
-        first_card = next(iter(card_matches.keys()))
-
-        for first_match in card_matches[first_card]:
-            pattern_sig = first_match.get_signature()
-            pattern_matches = [first_match]
-
-            for card_name, card_match_list in card_matches.items():
-                if card_name == first_card:
-                    continue
-
-                matching = next(
-                    (
-                        m
-                        for m in card_match_list
-                        if m.get_signature() == pattern_sig
-                    ),
-                    None,
+                if score > best_score:
+                    best_score, best_row = score, row
+                    if score == 15:
+                        break
+
+            best_by_card[card_name] = (best_score, best_row)
+
+        representative = [
+            (card_name, best_by_card[card_name][1])
+            for card_name in card_names
+            if card_name in best_by_card
+        ]
+
+        return self._build_matches(representative)
+
+    def _filter_consistent_rows(
+        self, rows_by_card: Dict[int, List[Tuple]]
+    ) -> List[Tuple[str, Tuple]]:
+        """Filter (card_name, row) pairs for patterns consistent across
+        cards"""
+        # Cards sharing a name are treated as one card
+        card_rows = defaultdict(list)
+        for card_idx, rows in rows_by_card.items():
+            card_rows[self.cards[card_idx].name].extend(rows)
+
+        # Signatures present on every card, intersected at C speed. The
+        # smallest card goes first and the intersection stops as soon as
+        # it is empty, so most FC values are rejected after one or two
+        # cards without indexing any rows
+        common = None
+        for rows in sorted(card_rows.values(), key=len):
+            sigs = (row[:_SIGNATURE_LEN] for row in rows)
+            common = set(sigs) if common is None else common.intersection(sigs)
+            if not common:
+                return []
+
+        # Index the surviving rows of each card by signature
+        card_sig_index: Dict[str, Dict[Tuple, Tuple]] = {}
+        for card_name, rows in card_rows.items():
+            index = card_sig_index[card_name] = {}
+            for row in rows:
+                sig = row[:_SIGNATURE_LEN]
+                if sig in common:
+                    index.setdefault(sig, row)
+
+        valid_rows = []
+        first_card = next(iter(card_rows.keys()))
+        other_indexes = [
+            (card_name, index)
+            for card_name, index in card_sig_index.items()
+            if card_name != first_card
+        ]
+
+        for first_row in card_rows[first_card]:
+            pattern_sig = first_row[:_SIGNATURE_LEN]
+            if pattern_sig in common:
+                valid_rows.append((first_card, first_row))
+                valid_rows.extend(
+                    (card_name, index[pattern_sig])
+                    for card_name, index in other_indexes
                 )
-                if matching:
-                    pattern_matches.append(matching)
-                else:
-                    break
-            else:
-                valid_matches.extend(pattern_matches)
 
-        return valid_matches
+        return valid_rows
 
-    def _is_reasonable_fc_value(self, fc_value: int) -> bool:
-        """Check if FC value is reasonable"""
-        return 1 <= fc_value <= 65535
-
-    def _apply_format_matching(self, candidate: FCCandidate):
-        """Apply HID format matching"""
+    def _build_format_bounds(self) -> List[Tuple]:
+        """Precompute the accepted (low, high) range of each layout field
+        per format, as (name, window, FC start, FC length, CN start, CN
+        length) tuples in format order"""
         if not self.hid_patterns.get("formats"):
-            return
+            return []
 
         tolerance = self.hid_patterns["tolerance"]
+        bit_tol, pos_tol = tolerance["bit_length"], tolerance["position"]
+        return [
+            (
+                fmt["name"],
+                (fmt["total_bits"] - bit_tol, fmt["total_bits"] + bit_tol),
+                (fmt["fc_position"] - pos_tol, fmt["fc_position"] + pos_tol),
+                (fmt["fc_bits"] - bit_tol, fmt["fc_bits"] + bit_tol),
+                (fmt["cn_position"] - pos_tol, fmt["cn_position"] + pos_tol),
+                (fmt["cn_bits"] - bit_tol, fmt["cn_bits"] + bit_tol),
+            )
+            for fmt in self.hid_patterns["formats"]
+        ]
+
+    def _apply_format_matching(self, candidate: FCCandidate):
+        """Apply HID format matching"""
         for match in candidate.matches:
-            for fmt in self.hid_patterns["formats"]:
-                if (
-                    abs(match.window_length - fmt["total_bits"])
-                    <= tolerance["bit_length"]
-                    and abs(match.fc_length - fmt["fc_bits"])
-                    <= tolerance["bit_length"]
-                    and abs(match.cn_length - fmt["cn_bits"])
-                    <= tolerance["bit_length"]
-                    and abs(match.fc_start - fmt["fc_position"])
-                    <= tolerance["position"]
-                    and abs(match.cn_start - fmt["cn_position"])
-                    <= tolerance["position"]
-                ):
-                    candidate.matched_format = fmt["name"]
-                    return
+            shape = (
+                match.window_length,
+                match.fc_start,
+                match.fc_length,
+                match.cn_start,
+                match.cn_length,
+            )
+            if shape in self._shape_formats:
+                name = self._shape_formats[shape]
+            else:
+                name = self._shape_formats[shape] = self._find_format(*shape)
+
+            if name is not None:
+                candidate.matched_format = name
+                return
+
+    def _find_format(
+        self,
+        window_len: int,
+        fc_start: int,
+        fc_len: int,
+        cn_start: int,
+        cn_len: int,
+    ) -> Optional[str]:
+        """Name of the first format accepting a layout, if any"""
+        for (
+            name,
+            (window_lo, window_hi),
+            (fc_start_lo, fc_start_hi),
+            (fc_len_lo, fc_len_hi),
+            (cn_start_lo, cn_start_hi),
+            (cn_len_lo, cn_len_hi),
+        ) in self._format_bounds:
+            if (
+                window_lo <= window_len <= window_hi
+                and fc_len_lo <= fc_len <= fc_len_hi
+                and cn_len_lo <= cn_len <= cn_len_hi
+                and fc_start_lo <= fc_start <= fc_start_hi
+                and cn_start_lo <= cn_start <= cn_start_hi
+            ):
+                return name
+        return None
 
     def get_best_candidates(self, max_candidates: int = 5) -> List[FCCandidate]:
         """Get the most likely FC candidates"""
@@ -393,8 +1026,11 @@ class RFIDAnalyzer:
         if self.known_fc is not None:
             candidates = [c for c in candidates if c.fc_value == self.known_fc]
 
-        candidates.sort(key=self._score_candidate, reverse=True)
-        return candidates[:max_candidates]
+        # Partial sort: only the top max_candidates are ordered. Ties keep
+        # their original order, as with a full stable sort
+        return heapq.nlargest(
+            max_candidates, candidates, key=self._score_candidate
+        )
 
     def _score_candidate(self, candidate: FCCandidate) -> float:
         """Score a candidate"""
@@ -426,45 +1062,55 @@ class RFIDAnalyzer:
         if not unknown_cards:
             return {}
 
-        # Get matches for unknown CN cards using threading
-        all_matches = []
-
-        if self.show_progress:
-            progress = ProgressBar(
-                len(unknown_cards), "Analyzing unknown CN patterns"
-            )
-
-        with ThreadPoolExecutor(max_workers=self.max_threads) as executor:
-            future_to_card = {
-                executor.submit(self._analyze_card_worker, card): card
-                for card in unknown_cards
-            }
-
-            for future in as_completed(future_to_card):
-                all_matches.extend(future.result())
-                if self.show_progress:
-                    progress.update()
-
-        if self.show_progress:
-            progress.close()
-
-        # Analyze patterns
-        fc_dist = defaultdict(int)
-        pattern_dist = defaultdict(int)
+        # Get raw rows for unknown CN cards. Every FC value is counted
+        # here, including those find_fc_candidates rejects
+        card_groups = self._scan_cards(
+            unknown_cards, "Analyzing unknown CN patterns", reasonable_fc=False
+        )
+
+        # Cards with the same data share one scan, so each distinct scan
+        # is counted once and weighted by the number of cards it covers
+        keys = [self._scan_args(card, False) for card in unknown_cards]
+        scan_weights = Counter(keys)
+        scans = dict(zip(keys, card_groups))
+
+        # Analyze patterns. Layouts are counted as tuples of
+        # (window, FC length, FC start, CN length, CN start) and only the
+        # most common ones are formatted
+        fc_dist = Counter()
+        pattern_dist = Counter()
+
+        for key, groups in scans.items():
+            weight = scan_weights[key]
+            scan_patterns = Counter()
+            for fc_val, rows in groups.items():
+                fc_dist[fc_val] += len(rows) * weight
+                scan_patterns.update(
+                    (row[2], row[4], row[3], row[6], row[5]) for row in rows
+                )
 
-        for match in all_matches:
-            fc_dist[match.fc_value] += 1
-            pattern_key = f"{match.window_length}b_FC{match.fc_length}@{match.fc_start}_CN{match.cn_length}@{match.cn_start}"
-            pattern_dist[pattern_key] += 1
+            if weight == 1:
+                pattern_dist.update(scan_patterns)
+            else:
+                for pattern, count in scan_patterns.items():
+                    pattern_dist[pattern] += count * weight
 
         return {
             "total_cards": len(self.cards),
             "cards_with_unknown_cn": len(unknown_cards),
             "potential_fc_values": set(fc_dist.keys()),
-            "most_common_fc_values": sorted(
-                fc_dist.items(), key=lambda x: x[1], reverse=True
-            )[:10],
-            "common_patterns": sorted(
-                pattern_dist.items(), key=lambda x: x[1], reverse=True
-            )[:5],
+            "most_common_fc_values": fc_dist.most_common(10),
+            "common_patterns": [
+                (
+                    f"{window_len}b_FC{fc_len}@{fc_start}_CN{cn_len}@{cn_start}",
+                    count,
+                )
+                for (
+                    window_len,
+                    fc_len,
+                    fc_start,
+                    cn_len,
+                    cn_start,
+                ), count in pattern_dist.most_common(5)
+            ],
         }
@@ -45,22 +45,48 @@ class ResultDisplay:
         if not use_colors or not sys.stdout.isatty():
             Colors.disable()
 
+        # Lines repeated per candidate and per card, built once the
+        # colors are settled
+        self._summary_line = (
+            f"{Colors.BOLD}[{{}}]{Colors.RESET} "
+            f"FC {Colors.BOLD}{{}}{Colors.RESET} | "
+            f"{Colors.CYAN}{{}}{Colors.RESET} matches | "
+            f"{Colors.BLUE}{{}}{Colors.RESET} cards | "
+            f"{Colors.MAGENTA}{{}}{Colors.RESET} patterns | "
+            "Conf: {}{}"
+        )
+        self._card_bits_line = (
+            f"#{Colors.YELLOW}{{}}{Colors.RESET}: "
+            f"FC={Colors.BOLD}{{}}{Colors.RESET}, "
+            f"CN={Colors.BOLD}{{}}{Colors.RESET}"
+        )
+        self._card_line = (
+            f"  {Colors.CYAN}{{}}{Colors.RESET}: "
+            f"{Colors.BOLD}{{}}{Colors.RESET} "
+            f"(CN: {Colors.MAGENTA}{{}}{Colors.RESET})"
+        )
+
     def print_cards(self, cards: List[CardData]):
         """Print card information"""
-        print(f"\n{Colors.BOLD}Cards:{Colors.RESET}")
-        for card in cards:
-            print(
-                f"  {Colors.CYAN}{card.name}{Colors.RESET}: "
-                f"{Colors.BOLD}{card.hex_data.upper()}{Colors.RESET} "
-                f"(CN: {Colors.MAGENTA}{card.known_cn}{Colors.RESET})"
+        self._write(self._card_lines(cards))
+
+    def _card_lines(self, cards: List[CardData]) -> List[str]:
+        """Build the card information lines"""
+        lines = [f"\n{Colors.BOLD}Cards:{Colors.RESET}"]
+        lines.extend(
+            self._card_line.format(
+                card.name, card.hex_data.upper(), card.known_cn
             )
+            for card in cards
+        )
+        return lines
 
     def print_candidate_summary(self, candidates: List[FCCandidate]):
         """Print summary of candidates"""
-        print(
-            f"\n{Colors.BOLD}{Colors.BLUE}Found {len(candidates)} FC candidates:{Colors.RESET}"
-        )
-        print(f"{Colors.CYAN}{'='*30}{Colors.RESET}")
+        lines = [
+            f"\n{Colors.BOLD}{Colors.BLUE}Found {len(candidates)} FC candidates:{Colors.RESET}",
+            f"{Colors.CYAN}{'='*30}{Colors.RESET}",
+        ]
 
         for i, candidate in enumerate(candidates, 1):
             confidence = self._get_confidence_level(candidate)
@@ -70,30 +96,44 @@ class ResultDisplay:
                 else ""
             )
 
-            print(
-                f"{Colors.BOLD}[{i}]{Colors.RESET} "
-                f"FC {Colors.BOLD}{candidate.fc_value}{Colors.RESET} | "
-                f"{Colors.CYAN}{len(candidate.matches)}{Colors.RESET} matches | "
-                f"{Colors.BLUE}{candidate.card_count}{Colors.RESET} cards | "
-                f"{Colors.MAGENTA}{len(candidate.unique_patterns)}{Colors.RESET} patterns | "
-                f"Conf: {confidence}{format_info}"
+            lines.append(
+                self._summary_line.format(
+                    i,
+                    candidate.fc_value,
+                    len(candidate.matches),
+                    candidate.card_count,
+                    len(candidate.unique_patterns),
+                    confidence,
+                    format_info,
+                )
             )
 
+        self._write(lines)
+
     def print_candidate_details(self, candidate: FCCandidate):
         """Print detailed information about a candidate"""
-        print(
-            f"\n{Colors.BOLD}{Colors.GREEN}FC {candidate.fc_value} - Details{Colors.RESET}"
-        )
-        print(f"{Colors.CYAN}{'='*60}{Colors.RESET}")
-
-        print(
+        self._write(self._candidate_detail_lines(candidate))
+
+    def print_all_candidate_details(self, candidates: List[FCCandidate]):
+        """Print detailed information about several candidates at once"""
+        lines = []
+        for candidate in candidates:
+            lines.extend(self._candidate_detail_lines(candidate))
+        if lines:
+            self._write(lines)
+
+    def _candidate_detail_lines(self, candidate: FCCandidate) -> List[str]:
+        """Build the detail lines for a candidate"""
+        lines = [
+            f"\n{Colors.BOLD}{Colors.GREEN}FC {candidate.fc_value} - Details{Colors.RESET}",
+            f"{Colors.CYAN}{'='*60}{Colors.RESET}",
             f"Summary: {Colors.BOLD}{len(candidate.matches)}{Colors.RESET} matches, "
             f"{Colors.BOLD}{candidate.card_count}{Colors.RESET} cards, "
-            f"{Colors.BOLD}{len(candidate.unique_patterns)}{Colors.RESET} patterns"
-        )
+            f"{Colors.BOLD}{len(candidate.unique_patterns)}{Colors.RESET} patterns",
+        ]
 
         if candidate.matched_format:
-            print(
+            lines.append(
                 f"Matched Format: {Colors.GREEN}{candidate.matched_format}{Colors.RESET}"
             )
 
@@ -105,44 +145,59 @@ class ResultDisplay:
         for i, (pattern_sig, pattern_matches) in enumerate(
             pattern_groups.items(), 1
         ):
-            self._print_pattern_details(i, pattern_matches)
+            self._add_pattern_details(lines, i, pattern_matches)
+
+        return lines
 
-    def _print_pattern_details(self, pattern_num: int, pattern_matches: List):
-        """Print details for a specific pattern"""
+    def _add_pattern_details(
+        self, lines: List[str], pattern_num: int, pattern_matches: List
+    ):
+        """Add the details for a specific pattern to lines"""
         pattern = pattern_matches[0]
-        cards_in_pattern = {match.card_name for match in pattern_matches}
 
-        print(f"\n{Colors.YELLOW}Pattern #{pattern_num}:{Colors.RESET}")
-        print(
-            f"  Window: {Colors.BOLD}{pattern.window_length}{Colors.RESET} bits at offset {pattern.window_offset}"
-        )
-        print(
-            f"  FC: {Colors.BOLD}{pattern.fc_length}{Colors.RESET} bits at pos {pattern.fc_start}"
-        )
-        print(
-            f"  CN: {Colors.BOLD}{pattern.cn_length}{Colors.RESET} bits at pos {pattern.cn_start}"
+        # First match of each card, in one pass over the matches
+        card_matches = {}
+        for match in pattern_matches:
+            card_matches.setdefault(match.card_name, match)
+
+        lines.extend(
+            [
+                f"\n{Colors.YELLOW}Pattern #{pattern_num}:{Colors.RESET}",
+                f"  Window: {Colors.BOLD}{pattern.window_length}{Colors.RESET} bits at offset {pattern.window_offset}",
+                f"  FC: {Colors.BOLD}{pattern.fc_length}{Colors.RESET} bits at pos {pattern.fc_start}",
+                f"  CN: {Colors.BOLD}{pattern.cn_length}{Colors.RESET} bits at pos {pattern.cn_start}",
+                f"  Reversed: {Colors.CYAN}{pattern.reverse}{Colors.RESET}",
+                f"  Cards: {Colors.CYAN}{len(card_matches)}{Colors.RESET}",
+            ]
         )
-        print(f"  Reversed: {Colors.CYAN}{pattern.reverse}{Colors.RESET}")
-        print(f"  Cards: {Colors.CYAN}{len(cards_in_pattern)}{Colors.RESET}")
 
-        for card_name in sorted(cards_in_pattern):
-            match = next(m for m in pattern_matches if m.card_name == card_name)
-            print(
-                f"#{Colors.YELLOW}{card_name}{Colors.RESET}: "
-                f"FC={Colors.BOLD}{match.fc_bits}{Colors.RESET}, "
-                f"CN={Colors.BOLD}{match.cn_bits}{Colors.RESET}"
+        for card_name in sorted(card_matches):
+            match = card_matches[card_name]
+            lines.append(
+                self._card_bits_line.format(
+                    card_name, match.fc_bits, match.cn_bits
+                )
             )
 
+    @staticmethod
+    def _write(lines: List[str]):
+        """Write a block of lines with a single call"""
+        sys.stdout.write("\n".join(lines) + "\n")
+
     def interactive_selection(self, candidates: List[FCCandidate]):
         """Interactive candidate selection"""
         self.print_candidate_summary(candidates)
 
+        options = [
+            f"\n{Colors.YELLOW}Options:{Colors.RESET}",
+            f" 1-{len(candidates)}: view details",
+            " 'a': show all",
+            " 'q': quit",
+        ]
+
         while True:
             try:
-                print(f"\n{Colors.YELLOW}Options:{Colors.RESET}")
-                print(f" 1-{len(candidates)}: view details")
-                print(f" 'a': show all")
-                print(f" 'q': quit")
+                self._write(options)
 
                 choice = (
                     input(f"\n{Colors.BOLD}Select: {Colors.RESET}")
@@ -153,8 +208,7 @@ class ResultDisplay:
                 if choice in ["q", "quit"]:
                     break
                 elif choice in ["a", "all"]:
-                    for candidate in candidates:
-                        self.print_candidate_details(candidate)
+                    self.print_all_candidate_details(candidates)
                 elif choice.isdigit() and 1 <= int(choice) <= len(candidates):
                     self.print_candidate_details(candidates[int(choice) - 1])
                 else:
@@ -179,16 +233,17 @@ class ResultDisplay:
             print(f"{Colors.RED}No cards added{Colors.RESET}")
             return
 
-        print(
+        lines = [
             f"{Colors.BOLD}{Colors.GREEN}Analyzing {len(analyzer.cards)} cards...{Colors.RESET}"
-        )
+        ]
 
         if analyzer.known_fc is not None:
-            print(
+            lines.append(
                 f"{Colors.YELLOW}Searching for FC: {analyzer.known_fc}{Colors.RESET}"
             )
 
-        self.print_cards(analyzer.cards)
+        lines.extend(self._card_lines(analyzer.cards))
+        self._write(lines)
 
         candidates = analyzer.get_best_candidates(max_candidates)
 
@@ -201,8 +256,7 @@ class ResultDisplay:
         )
 
         if len(candidates) == 1 or not interactive:
-            for candidate in candidates:
-                self.print_candidate_details(candidate)
+            self.print_all_candidate_details(candidates)
         else:
             self.interactive_selection(candidates)
 
@@ -11,6 +11,9 @@ from typing import List, Optional, Tuple
 class CardData:
     """Holds card information"""
 
+    # Like Match, no per-instance __dict__
+    __slots__ = ("hex_data", "known_cn", "name")
+
     hex_data: str
     known_cn: int
     name: str
@@ -20,6 +23,22 @@ class CardData:
 class Match:
     """Represents a potential FC/CN match"""
 
+    # Matches are created in bulk, so avoid a per-instance __dict__
+    __slots__ = (
+        "reverse",
+        "window_offset",
+        "window_length",
+        "fc_value",
+        "fc_bits",
+        "fc_start",
+        "fc_length",
+        "cn_value",
+        "cn_bits",
+        "cn_start",
+        "cn_length",
+        "card_name",
+    )
+
     reverse: bool
     window_offset: int
     window_length: int
@@ -35,6 +54,8 @@ class Match:
 
     def get_signature(self) -> Tuple:
         """Get unique signature for this bit pattern"""
+        # Built on demand: the analyzer groups raw scan rows, so only
+        # display and FCCandidate ask for it, once per match
         return (
             self.reverse,
             self.window_offset,
@@ -51,16 +72,33 @@ class FCCandidate:
     """Represents a facility code candidate"""
 
     fc_value: int
-    matches: List[Match]
+    matches: Tuple[Match, ...]
     consistency_score: float
     matched_format: Optional[str] = None
 
+    def __post_init__(self):
+        # A tuple, so the values derived from it below cannot go stale;
+        # they are derived again if matches is replaced
+        self.matches = tuple(self.matches)
+        self._card_count_of: Optional[Tuple[Match, ...]] = None
+        self._patterns_of: Optional[Tuple[Match, ...]] = None
+
     @property
     def unique_patterns(self) -> List[Tuple]:
         """Get all unique bit patterns for this FC"""
-        return list(set(match.get_signature() for match in self.matches))
+        if self._patterns_of is not self.matches:
+            self._unique_patterns = list(
+                set(match.get_signature() for match in self.matches)
+            )
+            self._patterns_of = self.matches
+        return self._unique_patterns
 
     @property
     def card_count(self) -> int:
         """Number of cards with this FC"""
-        return len(set(match.card_name for match in self.matches))
+        if self._card_count_of is not self.matches:
+            self._card_count = len(
+                set(match.card_name for match in self.matches)
+            )
+            self._card_count_of = self.matches
+        return self._card_count
@@ -71,6 +71,11 @@ Examples:
     parser.add_argument(
         "--no-color", action="store_true", help="Disable colors"
     )
+    parser.add_argument(
+        "--format-guided",
+        action="store_true",
+        help="Only try bit layouts close to a known HID format (much faster)",
+    )
     parser.add_argument(
         "--analyze-patterns",
         action="store_true",
@@ -85,7 +90,11 @@ Examples:
 
     try:
         analyzer = RFIDAnalyzer(
-            args.min_bits, args.max_bits, args.known_fc, args.unknown_cn
+            args.min_bits,
+            args.max_bits,
+            args.known_fc,
+            args.unknown_cn,
+            exhaustive=not args.format_guided,
         )
         display = ResultDisplay(use_colors=not args.no_color)
 
@@ -3,24 +3,66 @@
 Enhanced utilities for RFID card analysis with unknown CN support
 """
 
+import functools
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+# Each byte value with its bits in reverse order, for bytes.translate
+_REVERSED_BYTES = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
 
+# Every byte value that is not a hex digit, for bytes.translate deletion
+_NON_HEX_BYTES = bytes(
+    i for i in range(256) if chr(i) not in "0123456789abcdefABCDEF"
+)
+
+
+def _clean_hex(hex_string: str) -> bytes:
+    """Strip spaces and any other non-hex characters from hex_string
+
+    Done with two C-level calls instead of a per-character loop: non-ASCII
+    characters are dropped while encoding, the rest by a deletion table.
+    """
+    return hex_string.encode("ascii", "ignore").translate(None, _NON_HEX_BYTES)
+
+
+@functools.lru_cache(maxsize=4096)
+def hex_to_int(hex_string: str) -> Tuple[int, int]:
+    """Convert hex string to an integer and its bit length
+
+    The bit length is that of the value padded to full bytes, so bits can
+    be extracted with shifts and masks instead of string slicing.
+    """
+    value = int(_clean_hex(hex_string), 16)
+    bit_length = (max(value.bit_length(), 1) + 7) // 8 * 8
+
+    return value, bit_length
+
+
+@functools.lru_cache(maxsize=4096)
 def hex_to_binary(hex_string: str) -> str:
-    """Convert hex string to binary string"""
-    # Remove any spaces or non-hex characters
-    hex_clean = "".join(c for c in hex_string if c in "0123456789abcdefABCDEF")
+    """Convert hex string to binary string, padded to full bytes"""
+    value, bit_length = hex_to_int(hex_string)
+    return format(value, f"0{bit_length}b")
+
 
-    # Convert to binary
-    binary = bin(int(hex_clean, 16))[2:]
+@functools.lru_cache(maxsize=4096)
+def hex_to_bit_streams(hex_string: str) -> Tuple[Tuple[int, str], ...]:
+    """Convert hex string to its forward and bit-reversed streams
 
-    # Pad to ensure we have full bytes
-    while len(binary) % 8 != 0:
-        binary = "0" + binary
+    Each stream is returned both as an integer and as a binary string, so
+    repeated scans of the same card reuse one conversion.
+    """
+    forward, bit_length = hex_to_int(hex_string)
+    forward_bits = hex_to_binary(hex_string)
 
-    return binary
+    # The stream is padded to full bytes, so reversing it is reversing the
+    # byte order and the bits within each byte, without parsing the
+    # reversed string back
+    raw = forward.to_bytes(bit_length // 8, "big")
+    backward = int.from_bytes(raw.translate(_REVERSED_BYTES), "little")
+
+    return ((forward, forward_bits), (backward, forward_bits[::-1]))
 
 
 def load_cards_from_file(filename: str) -> List[Dict]:
@@ -211,9 +253,7 @@ def validate_hex_data(hex_data: str) -> bool:
     """Validate hex data format"""
     try:
         # Remove any spaces or separators
-        hex_clean = "".join(
-            c for c in hex_data if c in "0123456789abcdefABCDEF"
-        )
+        hex_clean = _clean_hex(hex_data)
 
         # Must have even number of characters (complete bytes)
         if len(hex_clean) % 2 != 0:
@@ -251,50 +291,21 @@ def format_bit_pattern(
 def analyze_bit_distribution(hex_data: str) -> Dict:
     """Analyze bit distribution in hex data"""
     binary = hex_to_binary(hex_data)
+    ones = binary.count("1")
 
-    analysis = {
+    # Every statistic comes from a C-level string scan. A transition is an
+    # "01" or "10" pair, and neither can overlap itself, so counting them
+    # is exact; runs are what remains after splitting on the other bit
+    return {
         "total_bits": len(binary),
-        "ones": binary.count("1"),
-        "zeros": binary.count("0"),
-        "density": binary.count("1") / len(binary),
-        "transitions": 0,
-        "longest_run_ones": 0,
-        "longest_run_zeros": 0,
+        "ones": ones,
+        "zeros": len(binary) - ones,
+        "density": ones / len(binary),
+        "transitions": binary.count("01") + binary.count("10"),
+        "longest_run_ones": max(map(len, binary.split("0"))),
+        "longest_run_zeros": max(map(len, binary.split("1"))),
     }
 
-    # Count transitions (bit changes)
-    for i in range(1, len(binary)):
-        if binary[i] != binary[i - 1]:
-            analysis["transitions"] += 1
-
-    # Find longest runs
-    current_run = 1
-    current_bit = binary[0]
-    longest_ones = 0
-    longest_zeros = 0
-
-    for i in range(1, len(binary)):
-        if binary[i] == current_bit:
-            current_run += 1
-        else:
-            if current_bit == "1":
-                longest_ones = max(longest_ones, current_run)
-            else:
-                longest_zeros = max(longest_zeros, current_run)
-            current_run = 1
-            current_bit = binary[i]
-
-    # Handle final run
-    if current_bit == "1":
-        longest_ones = max(longest_ones, current_run)
-    else:
-        longest_zeros = max(longest_zeros, current_run)
-
-    analysis["longest_run_ones"] = longest_ones
-    analysis["longest_run_zeros"] = longest_zeros
-
-    return analysis
-
 
 if __name__ == "__main__":
     # Create sample files when run directly